@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+"""
+Parser Throughput Comparison
+usage: parse.py [-h] [-r ROUNDS] [html ...]
+"""
+
+import argparse
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrape.extract import compare
+
+BLOCK = ("<div style='color: red; background-image: url(bg{0}.jpg)'><p>text {0}</p>"
+        "<img src='a{0}.jpg' srcset='a{0}.jpg 320w, b{0}.jpg 640w'></div>")
+
+def synthetic_page(blocks=5000):
+    """Make a large html page"""
+    return ("<html><head><style>.x { background: url(x.png) }</style></head><body>"
+            + "".join(BLOCK.format(i) for i in range(blocks)) + "</body></html>")
+
+def main(parser):
+    """Arg logic"""
+    args = parser.parse_args()
+    if args.html:
+        pages = [open(name, encoding="utf-8", errors="replace").read() for name in args.html]
+    else:
+        pages = [synthetic_page()]
+    size = sum(len(p) for p in pages) / 1024 / 1024
+    print(f"{len(pages)} page(s), {size:.2f} MB, {args.rounds} round(s)")
+    for name, rate in compare(pages, args.rounds).items():
+        print(f"\t{name:8} {rate:8.2f} pages/sec  {rate * size:8.2f} MB/sec")
+
+def setup_parser():
+    """Setup parser"""
+    parser = argparse.ArgumentParser(description="Parser Throughput Comparison")
+    parser.add_argument("html", help="HTML Files (Default: Synthetic Page)", nargs="*")
+    parser.add_argument("-r", "--rounds", help="Times To Parse Each Page", type=int, default=3)
+    return parser
+
+if __name__ == "__main__":
+        main(setup_parser())
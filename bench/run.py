@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+"""
+Offline Scrape Benchmark
+usage: run.py [-h] [--engine {loop,async}] [--pages N] [--images N] [--image-size BYTES]
+              [--data-uris N] [--styles N] [-w WORKERS] [-p PER_HOST] [-o OUT] [--compare OLD]
+"""
+
+from timeit import default_timer as timer
+from functools import wraps
+import contextlib
+import tempfile
+import argparse
+import resource
+import platform
+import json
+import time
+import sys
+import os
+import io
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import scrape
+from scrape import engine
+import server
+
+PHASES = {"page": "get_paths", "parse": "parse_html", "image": "download_thread"}
+RATES = ("pages_per_sec", "images_per_sec", "bytes_per_sec")
+
+def percentiles(values):
+    """Get p50/p90/p99/max in milliseconds"""
+    if not values: return {}
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))] * 1000
+    return {"count": len(values), "p50": round(pick(0.5), 3), "p90": round(pick(0.9), 3),
+            "p99": round(pick(0.99), 3), "max": round(values[-1] * 1000, 3)}
+
+def timed(name, fn, times):
+    """Wrap fn to record its durations"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = timer()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            times[name].append(timer() - start)
+    return wrapper
+
+def peak_rss():
+    """Peak resident memory in bytes"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if platform.system() == "Darwin" else rss * 1024
+
+def folder_stats(folder):
+    """Count files and bytes written"""
+    files, size = 0, 0
+    for root, _, names in os.walk(folder):
+        for name in names:
+            if name == scrape.INFO_FILE: continue
+            files += 1
+            size += os.path.getsize(os.path.join(root, name))
+    return files, size
+
+def run(args, base):
+    """Scrape synthetic pages, return results"""
+    urls = [f"{base}/page/{i}" for i in range(args.pages)]
+    times = {name: [] for name in PHASES}
+    for name, attr in PHASES.items():
+        setattr(scrape, attr, timed(name, getattr(scrape, attr), times))
+    scrape.setup_pool(args.workers, args.per_host, scrape.MAX_IN_FLIGHT)
+    scrape.setup_session(args.pool_size)
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        scrape.ROOT_FOLDER = tmp_folder
+        start = timer()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if args.engine == "async":
+                engine.loop_urls(urls, args.async_pages, args.page_downloads)
+            else:
+                scrape.loop_urls(urls)
+        elapsed = timer() - start
+        files, size = folder_stats(tmp_folder)
+    return {
+        "elapsed_sec": round(elapsed, 4),
+        "pages": len(urls),
+        "images": files,
+        "bytes": size,
+        "pages_per_sec": round(len(urls) / elapsed, 3),
+        "images_per_sec": round(files / elapsed, 3),
+        "bytes_per_sec": round(size / elapsed, 1),
+        "peak_rss": peak_rss(),
+        "latency_ms": {name: percentiles(values) for name, values in times.items()},
+    }
+
+def compare(result, old):
+    """Print rate changes against an older result"""
+    print(f"Compared to {old['created']} ({old['config']['engine']}):")
+    for key in RATES + ("peak_rss",):
+        before, after = old["results"][key], result["results"][key]
+        change = (after - before) / before * 100 if before else 0
+        print(f"\t{key:16} {before:>14,.1f} -> {after:>14,.1f} ({change:+.1f}%)")
+
+def main(parser):
+    """Arg logic"""
+    args = parser.parse_args()
+    config = {"images": args.images, "image_size": args.image_size, "data_uris": args.data_uris, "styles": args.styles}
+    process, base = server.start(config)
+    try:
+        results = run(args, base)
+    finally:
+        process.terminate()
+    result = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "version": scrape.__version__,
+        "python": platform.python_version(),
+        "config": dict(vars(args), out=None, compare=None),
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+    print(json.dumps(results, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+def setup_parser():
+    """Setup parser"""
+    parser = argparse.ArgumentParser(description="Offline Scrape Benchmark")
+    parser.add_argument("--engine", help="Scrape Engine", choices=("loop", "async"), default="loop")
+    parser.add_argument("--pages", help="Pages To Scrape", type=int, default=20)
+    parser.add_argument("--images", help="Images Per Page", type=int, default=server.CONFIG["images"])
+    parser.add_argument("--image-size", help="Image Size In Bytes", type=int, default=server.CONFIG["image_size"])
+    parser.add_argument("--data-uris", help="Data URI Images Per Page", type=int, default=server.CONFIG["data_uris"])
+    parser.add_argument("--styles", help="Inline Style Images Per Page", type=int, default=server.CONFIG["styles"])
+    parser.add_argument("-w", "--workers", help="Download Worker Threads", type=int, default=scrape.WORKERS)
+    parser.add_argument("-p", "--per-host", help="Max Downloads Per Host", type=int, default=scrape.PER_HOST)
+    parser.add_argument("--pool-size", help="Keep-Alive Connections Per Host", type=int, default=scrape.POOL_SIZE)
+    parser.add_argument("--async-pages", help="Async: Pages Fetched At Once", type=int, default=engine.PAGES)
+    parser.add_argument("--page-downloads", help="Async: Pages Downloading At Once", type=int, default=engine.PAGE_DOWNLOADS)
+    parser.add_argument("-o", "--out", help="Save Result JSON")
+    parser.add_argument("--compare", help="Compare With Older Result JSON", metavar="OLD")
+    return parser
+
+if __name__ == "__main__":
+        main(setup_parser())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+"""
+Synthetic Site Server
+usage: server.py [-h] [--port PORT] [--images N] [--image-size BYTES] [--data-uris N] [--styles N]
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from functools import lru_cache
+import multiprocessing
+import argparse
+import base64
+
+PNG_HEAD = b"\x89PNG\r\n\x1a\n"
+PNG_TAIL = b"IEND\xaeB`\x82"
+CONFIG = {"images": 20, "image_size": 20 * 1024, "data_uris": 2, "data_size": 512, "styles": 2, "filler": 200}
+
+@lru_cache(maxsize=512)
+def image_bytes(size, seed):
+    """Make png-looking bytes of about size"""
+    body = bytes((seed + i) % 251 for i in range(251))
+    body = body * (max(0, size - len(PNG_HEAD) - len(PNG_TAIL)) // len(body) + 1)
+    return PNG_HEAD + body[:max(0, size - len(PNG_HEAD) - len(PNG_TAIL))] + PNG_TAIL
+
+def page_html(page, config):
+    """Make a page with images, data uris, inline styles and filler text"""
+    data = base64.b64encode(image_bytes(config["data_size"], page)).decode()
+    parts = ["<html><head><title>Page</title></head><body>"]
+    parts += [f"<p>filler paragraph {i} for page {page}</p>" for i in range(config["filler"])]
+    parts += [f"<img src='/img/{page}/{i}.png' alt='image {i}'>" for i in range(config["images"])]
+    parts += [f"<img src='data:image/png;base64,{data}'>" for _ in range(config["data_uris"])]
+    parts += [f"<div style='color: red; background-image: url(/bg/{page}/{i}.png)'></div>" for i in range(config["styles"])]
+    parts.append("</body></html>")
+    return "\n".join(parts).encode()
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """/page/N serves html, any .png path serves an image"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    config = CONFIG
+
+    def do_GET(self):
+        path = self.path.split("?")[0].strip("/").split("/")
+        if path[-1].endswith(".png"):
+            body, kind = image_bytes(self.config["image_size"], len(self.path) % 251), "image/png"
+        elif path[0] == "page" and len(path) > 1 and path[1].isdigit():
+            body, kind = page_html(int(path[1]), self.config), "text/html"
+        else:
+            body, kind = b"not found", "text/plain"
+        self.send_response(200 if kind != "text/plain" else 404)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve(config, port=0, ready=None):
+    """Run server until killed, report port to ready queue"""
+    SiteHandler.config = dict(CONFIG, **config)
+    httpd = ThreadingHTTPServer(("127.0.0.1", port), SiteHandler)
+    httpd.daemon_threads = True
+    if ready: ready.put(httpd.server_address[1])
+    httpd.serve_forever()
+
+def start(config, port=0):
+    """Start server in its own process, return (process, base url)"""
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(config, port, ready), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{ready.get(timeout=10)}"
+
+def main(parser):
+    """Arg logic"""
+    args = parser.parse_args()
+    config = {"images": args.images, "image_size": args.image_size, "data_uris": args.data_uris, "styles": args.styles}
+    print(f"Serving on http://127.0.0.1:{args.port}/page/N")
+    serve(config, args.port)
+
+def setup_parser():
+    """Setup parser"""
+    parser = argparse.ArgumentParser(description="Synthetic Site Server")
+    parser.add_argument("--port", help="Port", type=int, default=8800)
+    parser.add_argument("--images", help="Images Per Page", type=int, default=CONFIG["images"])
+    parser.add_argument("--image-size", help="Image Size In Bytes", type=int, default=CONFIG["image_size"])
+    parser.add_argument("--data-uris", help="Data URI Images Per Page", type=int, default=CONFIG["data_uris"])
+    parser.add_argument("--styles", help="Inline Style Images Per Page", type=int, default=CONFIG["styles"])
+    return parser
+
+if __name__ == "__main__":
+        main(setup_parser())
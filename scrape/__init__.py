@@ -1,14 +1,23 @@
 #!/usr/bin/env python3
 """Web Image Scaper"""
 
-from threading import Thread
-from bs4 import *
-from io import BytesIO
-from PIL import Image
-import requests
 import os
 import re
-import base64
+import errno
+import hashlib
+import shutil
+import sys
+from time import perf_counter
+from urllib.parse import urljoin
+from scrape.pool import DownloadPool, WORKERS, PER_HOST, MAX_IN_FLIGHT
+from scrape.stream import stream_to_temp, SkipDownload
+from scrape.index import ImageIndex, INDEX_FILE
+from scrape.cache import HTTPCache, CACHE_FOLDER, CACHE_SIZE, conditional_headers
+from scrape.extract import find_attr_url, attr_url, style_urls, stream_paths
+from scrape.datauri import decode_to_temp, convert_image
+from scrape.metrics import Metrics, response_retries
+from scrape.probe import ImageFilter
+from threading import Lock
 
 __author__ = "Jason Rebuck"
 __copyright__ = "2022"
@@ -23,7 +32,29 @@ HEADERS = {
 
 ROOT_FOLDER = os.path.expanduser("~/Desktop/scraped_images")
 INFO_FILE = "INFO.txt"
-TAGS = {"div" : ("style",), "source": ("src",), "img" : ("data-lazyload", "data-srcset", "data-src", "src"),}
+TAGS = {"div" : ("style",), "source": ("srcset", "src"), "img" : ("data-lazyload", "data-srcset", "data-src", "srcset", "src"),}
+PARSER = "stream"
+MAX_SIZE = 0
+CONTENT_TYPES = ()
+POOL = None
+SESSION = None
+INDEX = None
+CACHE = None
+CONVERT = None
+CONVERTER = None
+METRICS = None
+FILTER = None
+NAME_LOCK = Lock()
+NAMES = {}
+NAME_COUNTS = {}
+URL_WHITESPACE = re.compile("[\t\r\n]")
+LAZY = {"ScrapeSession": "scrape.session", "POOL_SIZE": "scrape.session", "TIMEOUT": "scrape.session", "RETRIES": "scrape.session"}
+
+def __getattr__(name):
+    """Load requests (via scrape.session) on first use, not at import"""
+    if name not in LAZY: raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    return getattr(importlib.import_module(LAZY[name]), name)
 
 ## FIXES
 def image_fix(img, url):
@@ -52,16 +83,83 @@ def http_fix(url):
     if not url: return ""
     return f"http://{url}" if not url.startswith("http") else url.replace("https://", "http://")
 
+def link_fix(link, url):
+    """Make absolute page url from href (fragment dropped, query kept), empty for non page links"""
+    #TEST test_link_fix
+    link = URL_WHITESPACE.sub("", link or "").strip()
+    if not link or link.startswith(("#", "mailto:", "javascript:", "tel:", "data:")): return ""
+    link = urljoin(url, link).split("#")[0]
+    return http_fix(link) if link.startswith("http") else ""
+
 ## MAKE NAMES and FOLDERS
 def make_img_name(name):
-    """Make sure image name is unique."""
-    file_name, file_ext = os.path.splitext(name)
-    i = 0
-    while os.path.exists(name):
-        i += 1
-        name = f"{file_name}{i}{file_ext}"
+    """Make sure image name is unique.
+    Folder is listed once, then names are reserved in memory."""
+    #TEST test_make_img_name
+    folder, base = os.path.split(name)
+    file_name, file_ext = os.path.splitext(base)
+    with NAME_LOCK:
+        if folder not in NAMES:
+            NAMES[folder] = set(os.listdir(folder or ".")) if os.path.isdir(folder or ".") else set()
+            NAME_COUNTS[folder] = {}
+        taken, counts = NAMES[folder], NAME_COUNTS[folder]
+        i = counts.get(base, 0)
+        new_name = f"{file_name}{i}{file_ext}" if i else base
+        while new_name in taken:
+            i += 1
+            new_name = f"{file_name}{i}{file_ext}"
+        counts[base] = i
+        taken.add(new_name)
+    return os.path.join(folder, new_name)
+
+def forget_names(folder):
+    """Drop folder's name reservations once its downloads are done"""
+    with NAME_LOCK:
+        NAMES.pop(folder, None)
+        NAME_COUNTS.pop(folder, None)
+
+def create_empty(name):
+    """Create an empty file only if name is free (O_EXCL, safe against other processes)"""
+    try:
+        os.close(os.open(name, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+def reserve_name(name):
+    """Create an empty file at a free unique name.
+    Checked on disk, so files made since the folder was listed are never reused."""
+    #TEST test_move_into_place
+    while True:
+        new_name = make_img_name(name)
+        if create_empty(new_name): return new_name
+
+def move_into_place(tmp, name):
+    """Rename temp file to a unique image name"""
+    name = reserve_name(name)
+    try:
+        os.replace(tmp, name)
+    except:
+        os.unlink(name)
+        raise
     return name
 
+def link_into_place(src, name):
+    """Hardlink stored file to a unique image name, copy if links aren't possible"""
+    #TEST test_link_into_place
+    while True:
+        new_name = make_img_name(name)
+        try:
+            os.link(src, new_name)
+            return new_name
+        except FileExistsError:
+            pass
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM): raise
+            if create_empty(new_name):
+                shutil.copyfile(src, new_name)
+                return new_name
+
 def make_folder(name):
     """Make URL image folder"""
     folder = os.path.join(ROOT_FOLDER, string_fix(name))
@@ -69,93 +167,285 @@ def make_folder(name):
     return folder
 
 ## GET PATHS
-def get_paths(url):
-    """Download html from url and find urls"""
+def get_paths(url, links=None):
+    """Download html from url and find urls, add page links to links if given"""
     #TEST test_get_paths
-    url = http_fix(url)
     try:
-        soup = BeautifulSoup(requests.get(url, headers=HEADERS, timeout=10).text, "html.parser")
+        return fetch_paths(url, links)
     except:
-        print("\t-XX- ERROR GETTING URL", url)
+        print("\t-XX- ERROR GETTING URL", http_fix(url))
         return []
-    return search_tags(soup, url)
-
-def find_attr_url(string):
-    """Find background-image url in style"""
-    #TEST test_find_attr_url
-    for part in string.split(";"):
-        if "background-image" in part:
-            img = re.findall(r"\([\"']?(.*?)[\"']?\)", part)
-            return img[0] if img else ""
-    return ""
-
-def search_tags(soup, url):
-    """Search html for tags and grab paths"""
+
+def fetch_paths(url, links=None):
+    """Same as get_paths, but fetch errors are raised"""
+    url = http_fix(url)
+    start = perf_counter()
+    try:
+        entry = CACHE.get(url) if CACHE else None
+        r = get_session().get(url, headers=conditional_headers(entry))
+        if entry and r.status_code == 304:
+            paths = CACHE.page_paths(entry)
+            if links is not None: links.extend(CACHE.page_links(entry))
+            if METRICS: record_page(url, r, start, perf_counter(), paths)
+            return paths
+        html = r.text
+    except:
+        if METRICS: METRICS.event("page", url, {"fetch": perf_counter() - start}, error=error_name())
+        raise
+    fetched = perf_counter()
+    found = []
+    paths = parse_html(html, url, found)
+    found = [link for link in (link_fix(href, url) for href in found) if link]
+    if links is not None: links.extend(found)
+    if CACHE and r.status_code == 200: CACHE.put_page(url, r.headers, paths, found)
+    if METRICS: record_page(url, r, start, fetched, paths)
+    return paths
+
+def search_tags(soup, url, links=None):
+    """Search html for tags and grab paths, add raw hrefs to links if given"""
     #TEST test_search_tags
+    if links is not None: links.extend(a["href"] for a in soup.find_all("a", href=True))
     paths = []
     for tag in TAGS:
-        for image in soup.findAll(tag):
+        for image in soup.find_all(tag):
             for attr in TAGS[tag]:
                 img = image.get(attr)
                 if not img: continue
-                if attr == "style":
-                    img = find_attr_url(img)
-                paths.append(image_fix(img, url))
+                paths.append(image_fix(attr_url(attr, img), url))
+    for style in soup.find_all("style"):
+        paths.extend(image_fix(img, url) for img in style_urls(style.get_text()))
     return [p for p in paths if p]
 
+## PARSERS
+def parse_stream(html, url, links=None):
+    """Single pass event parser"""
+    return stream_paths(html, url, TAGS, image_fix, links)
+
+def parse_soup(html, url, links=None):
+    """BeautifulSoup tree parser"""
+    from bs4 import BeautifulSoup
+    return search_tags(BeautifulSoup(html, "html.parser"), url, links)
+
+PARSERS = {"stream": parse_stream, "bs4": parse_soup}
+
+def parse_html(html, url, links=None):
+    """Find image paths in html with the selected parser"""
+    return PARSERS[PARSER](html, url, links)
+
 ## SAVE FILES
-def save_info(images, folder):
-    """Save key value pairs in a file"""
+def save_info(images, folder, skipped=None):
+    """Save key value pairs in a file, skipped maps number to reason"""
     #TEST test_save_info
+    skipped = skipped or {}
     try:
         with open(os.path.join(folder, INFO_FILE), "w") as f:
             for i, img in enumerate(images, 1):
-                f.write(f'{i:02})\t{img}\n')
+                f.write(f'{i:02})\t{img}' + (f'\tSKIPPED: {skipped[i]}' if i in skipped else '') + '\n')
     except:
         print("\t-XX- ERROR SAVING INFO", folder)
 
 def save_image_data(data, folder):
-    """Save base64 Images"""
+    """Save data uri images as decoded, no re-encode"""
     #TEST test_save_data_pass, test_save_data_fail
+    start = perf_counter()
+    result = "ok"
     try:
-        ext = re.search(r"^data:image\/([a-z]{3,4})", data)[1].replace("jpg","jpeg")
-        img_data = re.sub('^data:image/.+;base64,', '', data)
-        img = Image.open(BytesIO(base64.b64decode(img_data)))
-        img.save(make_img_name(os.path.join(folder, f"data_image.{ext}")), ext.upper())
+        tmp, ext = decode_to_temp(data, folder)
+        name = move_into_place(tmp, os.path.join(folder, f"data_image.{ext}"))
+        decoded = perf_counter()
+        if CONVERT and CONVERT != ext: name, result = convert_saved(name, folder)
     except:
         print("\t-XX- ERROR SAVING DATA IMAGE", data[:150])
+        if METRICS: METRICS.event("data_image", data[:64], {"decode": perf_counter() - start}, error=error_name())
         raise
+    if METRICS:
+        phases = {"decode": decoded - start, "convert": perf_counter() - decoded}
+        METRICS.event("data_image", data[:64], {k: v for k, v in phases.items() if v}, size=os.path.getsize(name), result=result)
+
+def convert_saved(name, folder):
+    """Convert saved data image to CONVERT, keep the original if Pillow can't (ex: svg)"""
+    dest = reserve_name(os.path.join(folder, f"data_image.{CONVERT}"))
+    try:
+        return get_converter().submit(convert_image, name, dest, CONVERT).result(), "ok"
+    except Exception:
+        if os.path.exists(dest): os.unlink(dest)
+        print("\t-CV- SAVED, NOT CONVERTED", name)
+        return name, "not_converted"
 
 def save_image_contents(img, folder):
     """Save image/path to file"""
     #TEST test_save_image_contents
+    stats = {"start": perf_counter()} if METRICS else None
     try:
-        contents = requests.get(img, headers=HEADERS, timeout=10).content
-        with open(make_img_name(os.path.join(folder, os.path.basename(img))), "wb+") as f:
-            f.write(contents)
+        result = fetch_image(img, folder, stats)
+    except SkipDownload as e:
+        print("\t-SK- SKIPPED IMAGE", img, f"({e})")
+        if METRICS: record_image(img, stats, "skipped")
+        raise
     except:
         print("\t-XX- ERROR SAVING IMAGE", img)
+        if METRICS: record_image(img, stats, "error", error_name())
         raise
+    if METRICS: record_image(img, stats, result)
+
+def fetch_image(img, folder, stats=None):
+    """Download image into folder, return how it was saved (ok, known, not_modified)"""
+    name = os.path.join(folder, os.path.basename(img))
+    if INDEX and link_known(img, name): return "known"
+    entry = CACHE.get(img) if CACHE else None
+    hasher = hashlib.sha256() if INDEX else None
+    with get_session().get(img, stream=True, headers=conditional_headers(entry)) as r:
+        if stats is not None: stats.update(headers=r.elapsed.total_seconds(), retries=response_retries(r))
+        if entry and r.status_code == 304:
+            if not CACHE.has_copy(entry, folder): CACHE.add_copy(img, link_into_place(CACHE.blob(entry), name))
+            return "not_modified"
+        tmp = stream_to_temp(r, folder, MAX_SIZE, CONTENT_TYPES, hasher=hasher, stats=stats, image_filter=FILTER)
+    if INDEX:
+        name = store_indexed(img, hasher.hexdigest(), tmp, name)
+    else:
+        name = move_into_place(tmp, name)
+    if CACHE and r.status_code == 200: CACHE.put_file(img, r.headers, name)
+    return "ok"
+
+## METRICS
+def setup_metrics(log=None, prom=None):
+    """Turn on timing/count metrics with optional json lines log and prometheus file"""
+    global METRICS
+    if METRICS: METRICS.close()
+    METRICS = Metrics(log, prom)
+    if SESSION: setup_session(SESSION.pool_size, SESSION.timeout, SESSION.retries)
+    return METRICS
+
+def error_name():
+    """Name of the exception being handled"""
+    return sys.exc_info()[0].__name__
+
+def record_page(url, r, start, fetched, paths):
+    """Record page fetch/parse times"""
+    headers = r.elapsed.total_seconds()
+    phases = {"headers": headers, "body": max(0, fetched - start - headers), "parse": perf_counter() - fetched}
+    METRICS.event("page", url, phases, size=len(r.content), retries=response_retries(r),
+            status=r.status_code, images=len(paths))
+
+def record_image(img, stats, result, error=None):
+    """Record image transfer/write times"""
+    total = perf_counter() - stats["start"]
+    headers, write = stats.get("headers", 0), stats.get("write", 0)
+    phases = {"headers": headers, "body": max(0, total - headers - write), "write": write}
+    if "headers" not in stats: phases = {"total": total}
+    METRICS.event("image", img, phases, size=stats.get("bytes", 0), retries=stats.get("retries", 0),
+            error=error, result=result)
+
+## DEDUP INDEX
+def setup_index(path=None):
+    """Open the shared dedup index (default in ROOT_FOLDER)"""
+    global INDEX
+    if INDEX: INDEX.close()
+    INDEX = ImageIndex(path or os.path.join(ROOT_FOLDER, INDEX_FILE))
+    return INDEX
+
+def link_known(img, name):
+    """Reuse stored copy of an already fetched url"""
+    digest = INDEX.url_hash(img)
+    if not digest: return False
+    if INDEX.find(digest, os.path.dirname(name)): return True
+    src = INDEX.find(digest)
+    if not src: return False
+    INDEX.add_file(link_into_place(src, name), digest)
+    return True
+
+def store_indexed(img, digest, tmp, name):
+    """Place downloaded temp file, linking to stored content when it exists.
+    Returns path holding the content."""
+    INDEX.add_url(img, digest)
+    known = INDEX.find(digest, os.path.dirname(name))
+    if known:
+        os.unlink(tmp)
+        return known
+    src = INDEX.find(digest)
+    if src:
+        os.unlink(tmp)
+        name = link_into_place(src, name)
+    else:
+        name = move_into_place(tmp, name)
+    INDEX.add_file(name, digest)
+    return name
+
+## IMAGE CONVERT
+def setup_convert(fmt, processes=None):
+    """Convert saved data images to fmt in a process pool"""
+    global CONVERT, CONVERTER
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    if CONVERTER: CONVERTER.shutdown()
+    CONVERT = fmt.lower().replace("jpg", "jpeg") if fmt else None
+    CONVERTER = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn")) if fmt else None
+    return CONVERTER
+
+def get_converter():
+    """Get image convert process pool, make it if needed"""
+    return CONVERTER or setup_convert(CONVERT)
+
+## IMAGE FILTER
+def setup_filter(min_width=0, max_width=0, min_height=0, max_height=0, min_size=0, formats=()):
+    """Skip images by dimensions, byte size or format before they are fully downloaded"""
+    global FILTER
+    FILTER = ImageFilter(min_width, max_width, min_height, max_height, min_size, formats)
+    return FILTER
+
+## HTTP CACHE
+def setup_cache(max_size=CACHE_SIZE, folder=None):
+    """Open the shared http cache (default in ROOT_FOLDER)"""
+    global CACHE
+    if CACHE: CACHE.close()
+    CACHE = HTTPCache(folder or os.path.join(ROOT_FOLDER, CACHE_FOLDER), max_size)
+    return CACHE
+
+## HTTP SESSION
+def setup_session(pool_size=None, timeout=None, retries=None):
+    """Replace the shared http session (None = session default)"""
+    global SESSION
+    from scrape.session import ScrapeSession, POOL_SIZE, TIMEOUT, RETRIES
+    if SESSION: SESSION.close()
+    SESSION = ScrapeSession(HEADERS, POOL_SIZE if pool_size is None else pool_size, TIMEOUT if timeout is None else timeout,
+            RETRIES if retries is None else retries, METRICS.connected if METRICS else None)
+    return SESSION
+
+def get_session():
+    """Get shared http session, make it if needed"""
+    return SESSION or setup_session()
+
+## DOWNLOAD POOL
+def setup_pool(workers=WORKERS, per_host=PER_HOST, max_in_flight=MAX_IN_FLIGHT):
+    """Replace the shared download pool"""
+    global POOL
+    if POOL: POOL.shutdown()
+    POOL = DownloadPool(workers, per_host, max_in_flight)
+    return POOL
+
+def get_pool():
+    """Get shared download pool, make it if needed"""
+    return POOL or setup_pool()
 
 ## MAIN LOOPS
-def download_images(images, folder):
+def download_images(images, folder, label=""):
     """Download and save images paths"""
-    ok = 0
-    threads = []
-    for i, img in enumerate(images, 1):
-        if not img: continue
-        try:
-            t = Thread(target=download_thread, args=(i, img, folder))
-            threads.append(t)
-            t.start()
-        except KeyboardInterrupt:
-            exit()
-        except:
-            pass
-    for t in threads:
-        t.join()
-        ok += 1
-    print(f"\t{ok}/{len(images)} Images Downloaded")
+    pool = get_pool()
+    jobs = {}
+    try:
+        for i, img in enumerate(images, 1):
+            if not img: continue
+            jobs[i] = pool.submit(download_thread, img, i, img, folder)
+        errors = {i: job.exception() for i, job in jobs.items()}
+    except KeyboardInterrupt:
+        for job in jobs.values(): job.cancel()
+        exit()
+    ok = sum(1 for e in errors.values() if e is None)
+    skipped = {i: e for i, e in errors.items() if isinstance(e, SkipDownload)}
+    if skipped: save_info(images, folder, skipped)
+    forget_names(folder)
+    print(f"\t{ok}/{len(images)} Images Downloaded" + (f" ({label})" if label else ""))
+    return ok
 
 
 def download_thread(i, img, folder):
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Resumable Sharded Batch Mode"""
+
+from queue import Empty, Full
+import hashlib
+import sys
+import os
+import scrape
+
+PROCESSES = os.cpu_count() or 1
+QUEUE_PER_PROCESS = 4
+JOURNAL_FILE = ".scrape_journal"
+
+def read_urls(source):
+    """Yield urls from a file (or - for stdin) one line at a time, skip blanks and # comments"""
+    #TEST test_read_urls
+    f = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"): yield line
+    finally:
+        if f is not sys.stdin: f.close()
+
+def url_key(url):
+    """Compact journal key for url"""
+    return hashlib.blake2b(scrape.http_fix(url).encode(), digest_size=8).digest()
+
+def load_journal(path):
+    """Get keys of urls already done"""
+    #TEST test_load_journal
+    if not os.path.isfile(path): return set()
+    with open(path, encoding="utf-8") as f:
+        return {url_key(line.rstrip("\n")) for line in f if line.strip()}
+
+def get_settings():
+    """Snapshot scrape settings so worker processes match this one"""
+    return {
+        "ROOT_FOLDER": scrape.ROOT_FOLDER, "PARSER": scrape.PARSER,
+        "MAX_SIZE": scrape.MAX_SIZE, "CONTENT_TYPES": scrape.CONTENT_TYPES, "FILTER": scrape.FILTER,
+        "pool": scrape.POOL and (scrape.POOL.workers, scrape.POOL.per_host, scrape.POOL.max_in_flight),
+        "session": scrape.SESSION and (scrape.SESSION.pool_size, scrape.SESSION.timeout, scrape.SESSION.retries),
+        "index": scrape.INDEX and scrape.INDEX.path,
+        "cache": scrape.CACHE and (scrape.CACHE.max_size, scrape.CACHE.folder),
+        "convert": scrape.CONVERT,
+        "metrics": scrape.METRICS and (scrape.METRICS.log, scrape.METRICS.prom),
+    }
+
+def apply_settings(settings, shard=0):
+    """Rebuild scrape settings in a worker process"""
+    for name in ("ROOT_FOLDER", "PARSER", "MAX_SIZE", "CONTENT_TYPES", "FILTER"):
+        setattr(scrape, name, settings[name])
+    if settings["metrics"]:
+        log, prom = settings["metrics"]
+        scrape.setup_metrics(log, prom and f"{prom}.{shard}")
+    if settings["pool"]: scrape.setup_pool(*settings["pool"])
+    if settings["session"]: scrape.setup_session(*settings["session"])
+    if settings["index"]: scrape.setup_index(settings["index"])
+    if settings["cache"]: scrape.setup_cache(*settings["cache"])
+    if settings["convert"]: scrape.setup_convert(settings["convert"], 1)
+
+def scrape_url(url):
+    """Scrape one url into its folder, raise if the page could not be fetched"""
+    images = scrape.fetch_paths(url)
+    folder = scrape.make_folder(url)
+    scrape.save_info(images, folder)
+    scrape.download_images(images, folder, url)
+
+def worker(shard, settings, jobs, results):
+    """Scrape urls from jobs until None, report (url, ok) to results"""
+    apply_settings(settings, shard)
+    try:
+        while (url := jobs.get()) is not None:
+            print("+", url, f"[worker {shard}]")
+            try:
+                scrape_url(url)
+                results.put((url, True))
+            except KeyboardInterrupt:
+                raise
+            except:
+                print("\t-XX- ERROR GETTING URL", url)
+                results.put((url, False))
+    finally:
+        if scrape.METRICS: scrape.METRICS.close()
+        results.put(None)
+
+def run_batch(source, processes=PROCESSES, journal=None):
+    """Stream urls from source to worker processes, journal finished urls so reruns skip them"""
+    journal = journal or os.path.join(scrape.ROOT_FOLDER, JOURNAL_FILE)
+    if os.path.dirname(journal) and not os.path.isdir(os.path.dirname(journal)):
+        os.makedirs(os.path.dirname(journal))
+    import multiprocessing
+    finished = load_journal(journal)
+    counts = {"done": 0, "failed": 0, "skipped": 0}
+    ctx = multiprocessing.get_context("spawn")
+    jobs, results = ctx.Queue(maxsize=processes * QUEUE_PER_PROCESS), ctx.Queue()
+    settings = get_settings()
+    workers = [ctx.Process(target=worker, args=(i, settings, jobs, results), daemon=True) for i in range(processes)]
+    for p in workers: p.start()
+    running = len(workers)
+
+    with open(journal, "a", encoding="utf-8", buffering=1) as log:
+        def collect(block):
+            nonlocal running
+            while running:
+                try:
+                    item = results.get(timeout=1) if block else results.get_nowait()
+                except Empty:
+                    if not block: return
+                    if not any(p.is_alive() for p in workers): running = 0
+                    continue
+                if item is None:
+                    running -= 1
+                    continue
+                url, ok = item
+                counts["done" if ok else "failed"] += 1
+                if ok: log.write(url + "\n")
+
+        def send(item):
+            while True:
+                collect(block=False)
+                try:
+                    return jobs.put(item, timeout=0.5)
+                except Full:
+                    if not any(p.is_alive() for p in workers): raise RuntimeError("all batch workers died")
+
+        for url in read_urls(source):
+            if url_key(url) in finished:
+                counts["skipped"] += 1
+                continue
+            send(url)
+        for _ in workers: send(None)
+        collect(block=True)
+    for p in workers: p.join()
+    return counts
+
+def loop_batch(source, processes=PROCESSES, journal=None):
+    """Run batch mode with progress output"""
+    print()
+    print(f'--- Batch {source}, {processes} Process(es) ---')
+    print()
+    counts = run_batch(source, processes, journal)
+    print()
+    print(f'--- Finished {counts["done"]}, Failed {counts["failed"]}, Skipped {counts["skipped"]} ---')
+    return counts
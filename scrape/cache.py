@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Conditional Request Cache"""
+
+from threading import Lock, get_ident
+import hashlib
+import sqlite3
+import shutil
+import json
+import time
+import os
+
+CACHE_FOLDER = ".scrape_cache"
+CACHE_SIZE = 512 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY, etag TEXT, modified TEXT,
+    paths TEXT, blob TEXT, size INTEGER NOT NULL, used REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+"""
+
+def conditional_headers(entry):
+    """Make If-None-Match / If-Modified-Since headers for a cache entry"""
+    #TEST test_conditional_headers
+    headers = {}
+    if not entry: return headers
+    if entry["etag"]: headers["If-None-Match"] = entry["etag"]
+    if entry["modified"]: headers["If-Modified-Since"] = entry["modified"]
+    return headers
+
+class HTTPCache:
+    """Validators for pages (with found image paths/links) and images (with saved path and a linked copy).
+    Least recently used entries are dropped once stored bytes pass max_size."""
+
+    def __init__(self, folder, max_size=CACHE_SIZE):
+        if not os.path.isdir(folder): os.makedirs(folder)
+        self.folder = folder
+        self.max_size = max_size
+        self._lock = Lock()
+        self._db = sqlite3.connect(os.path.join(folder, "cache.sqlite"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self.size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, url):
+        """Get entry for url and mark it used, None if missing or its copy is gone"""
+        with self._lock:
+            entry = self._db.execute("SELECT * FROM entries WHERE url = ?", (url,)).fetchone()
+            if not entry: return None
+            if entry["blob"] and not os.path.isfile(self.blob(entry)):
+                self._drop([entry])
+                return None
+            with self._db:
+                self._db.execute("UPDATE entries SET used = ? WHERE url = ?", (time.time(), url))
+        return entry
+
+    def blob(self, entry):
+        """Path of cached copy"""
+        return os.path.join(self.folder, entry["blob"])
+
+    def page_paths(self, entry):
+        """Image paths found on a cached page"""
+        return json.loads(entry["paths"])["paths"]
+
+    def page_links(self, entry):
+        """Links found on a cached page"""
+        return json.loads(entry["paths"])["links"]
+
+    def has_copy(self, entry, folder):
+        """Check if an image entry was saved in folder and is still there"""
+        folder = os.path.abspath(folder)
+        return any(os.path.dirname(p) == folder and os.path.isfile(p) for p in json.loads(entry["paths"]))
+
+    def add_copy(self, url, path):
+        """Remember another folder copy of a cached image"""
+        with self._lock:
+            row = self._db.execute("SELECT paths FROM entries WHERE url = ?", (url,)).fetchone()
+            if not row: return
+            paths = json.loads(row["paths"])
+            if os.path.abspath(path) in paths: return
+            with self._db:
+                self._db.execute("UPDATE entries SET paths = ? WHERE url = ?", (json.dumps(paths + [os.path.abspath(path)]), url))
+
+    def put_page(self, url, headers, paths, links=()):
+        """Remember validators and found image paths and links for a page"""
+        data = json.dumps({"paths": paths, "links": list(links)})
+        self._put(url, headers, data, None, len(data))
+
+    def put_file(self, url, headers, path):
+        """Remember validators for an image and link a copy into the cache"""
+        if not self._validators(headers): return
+        blob = hashlib.sha1(url.encode()).hexdigest()
+        dest = os.path.join(self.folder, blob)
+        tmp = f"{dest}.{os.getpid()}.{get_ident()}.tmp"
+        try:
+            os.link(path, tmp)
+        except OSError:
+            shutil.copyfile(path, tmp)
+        os.replace(tmp, dest)
+        self._put(url, headers, json.dumps([os.path.abspath(path)]), blob, os.path.getsize(dest))
+
+    def _validators(self, headers):
+        """Get etag and last-modified from response headers"""
+        etag, modified = headers.get("ETag"), headers.get("Last-Modified")
+        return (etag, modified) if etag or modified else None
+
+    def _put(self, url, headers, paths, blob, size):
+        """Add/replace an entry and evict old ones"""
+        validators = self._validators(headers)
+        if not validators: return
+        with self._lock:
+            old = self._db.execute("SELECT size FROM entries WHERE url = ?", (url,)).fetchone()
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (url, *validators, paths, blob, size, time.time()))
+            self.size += size - (old["size"] if old else 0)
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until under max_size"""
+        while self.max_size and self.size > self.max_size:
+            rows = self._db.execute("SELECT * FROM entries ORDER BY used LIMIT 64").fetchall()
+            if not rows: break
+            over, drop = self.size - self.max_size, []
+            for row in rows:
+                drop.append(row)
+                over -= row["size"]
+                if over <= 0: break
+            self._drop(drop)
+
+    def _drop(self, rows):
+        """Delete entries and their copies"""
+        with self._db:
+            self._db.executemany("DELETE FROM entries WHERE url = ?", [(row["url"],) for row in rows])
+        for row in rows:
+            self.size -= row["size"]
+            if row["blob"]:
+                try:
+                    os.unlink(self.blob(row))
+                except OSError:
+                    pass
+
+    def close(self):
+        """Close database"""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Recursive Site Crawl"""
+
+from urllib.parse import urlsplit
+import tempfile
+import hashlib
+import math
+import scrape
+
+DEPTH = 1
+MAX_PAGES = 100
+CAPACITY = 1000000
+ERROR_RATE = 0.001
+SKIP_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".bmp", ".pdf", ".zip",
+        ".gz", ".mp3", ".mp4", ".webm", ".mov", ".avi", ".css", ".js", ".json", ".xml", ".woff", ".woff2")
+
+class BloomFilter:
+    """Fixed size visited-url set, may give false positives (never false negatives)"""
+
+    def __init__(self, capacity=CAPACITY, error_rate=ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        """Add item, return False if it was (probably) already there"""
+        new = False
+        for pos in self._positions(item):
+            byte, bit = pos >> 3, 1 << (pos & 7)
+            if not self.bits[byte] & bit:
+                self.bits[byte] |= bit
+                new = True
+        self.count += new
+        return new
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+class Frontier:
+    """Disk backed fifo of urls for one crawl depth"""
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.count = 0
+
+    def push(self, url):
+        """Add url (tabs and newlines dropped, as browsers do, so one url stays one line)"""
+        self._file.write(url.replace("\t", "").replace("\r", "").replace("\n", "") + "\n")
+        self.count += 1
+
+    def __iter__(self):
+        self._file.seek(0)
+        for line in self._file:
+            yield line.rstrip("\n")
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._file.close()
+
+def site_host(url):
+    """Get host used to keep crawl in site (www. ignored)"""
+    #TEST test_site_host
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+def follow_link(link, hosts):
+    """Check if link is an in-site page"""
+    #TEST test_follow_link
+    return site_host(link) in hosts and not urlsplit(link).path.lower().endswith(SKIP_EXTENSIONS)
+
+def crawl_site(urls, depth=DEPTH, max_pages=MAX_PAGES, capacity=CAPACITY, error_rate=ERROR_RATE):
+    """Scrape urls and in-site pages they link to, breadth first up to depth and max_pages"""
+    seen = BloomFilter(capacity, error_rate)
+    hosts = set()
+    level = Frontier()
+    for url in urls:
+        url = scrape.http_fix(url)
+        hosts.add(site_host(url))
+        if seen.add(url): level.push(url)
+    pages = 0
+    for d in range(depth + 1):
+        following = Frontier()
+        for url in level:
+            if max_pages and pages >= max_pages: break
+            pages += 1
+            print("+", url, f'[{pages} of {max_pages or "?"}, depth {d}]')
+            links = [] if d < depth else None
+            try:
+                images = scrape.get_paths(url, links)
+                folder = scrape.make_folder(url)
+                scrape.save_info(images, folder)
+                scrape.download_images(images, folder)
+            except Exception:
+                print("\t-XX- ERROR SAVING URL", url)
+            print()
+            for link in links or ():
+                if follow_link(link, hosts) and seen.add(link): following.push(link)
+        level.close()
+        level = following
+        if not len(level) or (max_pages and pages >= max_pages): break
+    level.close()
+    return pages
+
+def loop_site(urls, depth=DEPTH, max_pages=MAX_PAGES, capacity=CAPACITY):
+    """Crawl sites from urls"""
+    print()
+    print(f'--- Crawling {len(urls)} Site(s), Depth {depth}, Max {max_pages or "Unlimited"} Page(s) ---')
+    print()
+    pages = crawl_site(urls, depth, max_pages, capacity)
+    print(f'--- Finished {pages} Page(s) ---')
+    return pages
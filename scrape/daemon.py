@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Warm Scrape Daemon"""
+
+from contextlib import redirect_stdout
+from threading import Lock
+import socketserver
+import socket
+import json
+import os
+import scrape
+
+SOCKET_FILE = ".scrape.sock"
+JOB_LOCK = Lock()
+MODES = ("loop", "async", "recursive")
+
+def socket_path(path=None):
+    """Get daemon socket path (default in ROOT_FOLDER)"""
+    return path or os.path.join(scrape.ROOT_FOLDER, SOCKET_FILE)
+
+class JobOutput:
+    """File-like that sends printed text to the client as json lines, drops it once the client is gone"""
+
+    def __init__(self, f):
+        self.f = f
+        self.closed = False
+
+    def send(self, **message):
+        if self.closed: return
+        try:
+            self.f.write(json.dumps(message).encode() + b"\n")
+            self.f.flush()
+        except OSError:
+            self.closed = True
+
+    def write(self, text):
+        if text: self.send(out=text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+def run_job(job):
+    """Run one scrape job with the daemon's warm pools, return a summary"""
+    #TEST test_daemon
+    urls, mode = job.get("urls", []), job.get("mode", "loop")
+    if mode not in MODES: raise ValueError(f"unknown mode {mode!r}")
+    try:
+        if mode == "recursive":
+            from scrape import crawl
+            return {"pages": crawl.loop_site(urls, job.get("depth", crawl.DEPTH), job.get("max_pages", crawl.MAX_PAGES),
+                    job.get("bloom_capacity", crawl.CAPACITY))}
+        if mode == "async":
+            from scrape import engine
+            return engine.loop_urls(urls, job.get("pages", engine.PAGES), job.get("page_downloads", engine.PAGE_DOWNLOADS))
+        scrape.loop_urls(urls)
+        return {"pages": len(urls)}
+    finally:
+        with scrape.NAME_LOCK:
+            scrape.NAMES.clear()
+            scrape.NAME_COUNTS.clear()
+        if scrape.METRICS: scrape.METRICS.write_prometheus()
+
+class JobHandler(socketserver.StreamRequestHandler):
+    """Read one json job line, stream its output back, end with done or error"""
+
+    def handle(self):
+        output = JobOutput(self.wfile)
+        try:
+            job = json.loads(self.rfile.readline())
+            with JOB_LOCK, redirect_stdout(output):
+                result = run_job(job)
+        except Exception as e:
+            output.send(error=f"{type(e).__name__}: {e}")
+        else:
+            output.send(done=result)
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server, jobs run one at a time on the shared pools"""
+    daemon_threads = True
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address): os.unlink(self.server_address)
+
+def in_use(path):
+    """Check if a daemon already answers on path"""
+    with socket.socket(socket.AF_UNIX) as s:
+        try:
+            s.connect(path)
+            return True
+        except OSError:
+            return False
+
+def make_server(path=None):
+    """Warm up pool and session, bind the socket (stale socket files are replaced)"""
+    path = socket_path(path)
+    if os.path.exists(path):
+        if in_use(path): raise RuntimeError(f"daemon already running on {path}")
+        os.unlink(path)
+    if os.path.dirname(path) and not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    scrape.get_pool()
+    scrape.get_session()
+    return DaemonServer(path, JobHandler)
+
+def serve(path=None):
+    """Keep pools, session, cache and workers warm, run jobs from the socket until stopped"""
+    server = make_server(path)
+    print(f"--- Daemon Listening On {server.server_address} ---")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if scrape.METRICS: scrape.METRICS.close()
+
+def submit(job, path=None, out=None):
+    """Send job to the daemon, print its output, return the summary"""
+    with socket.socket(socket.AF_UNIX) as s:
+        s.connect(socket_path(path))
+        s.sendall(json.dumps(job).encode() + b"\n")
+        for line in s.makefile("rb"):
+            message = json.loads(line)
+            if "out" in message: print(message["out"], end="", file=out, flush=True)
+            elif "error" in message: raise RuntimeError(message["error"])
+            elif "done" in message: return message["done"]
+    raise ConnectionError("daemon closed the connection")
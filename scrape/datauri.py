@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Data URI Images"""
+
+from urllib.parse import unquote_to_bytes
+from scrape.stream import sniff_type
+import tempfile
+import base64
+import re
+import os
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r"\s")
+EXTENSIONS = {"jpg": "jpeg", "svg+xml": "svg", "x-icon": "ico", "vnd.microsoft.icon": "ico"}
+TRAILERS = {"image/png": b"IEND\xaeB`\x82", "image/jpeg": b"\xff\xd9", "image/gif": b";"}
+
+class BadDataURI(ValueError):
+    """Data uri can not be saved"""
+
+def parse_data_uri(data):
+    """Read data uri header, return (extension, is base64, payload start)"""
+    #TEST test_parse_data_uri
+    comma = data.find(",", 0, 256)
+    if not data.startswith("data:") or comma < 0:
+        raise BadDataURI("not a data uri")
+    params = data[5:comma].split(";")
+    kind, _, subtype = params[0].strip().lower().partition("/")
+    ext = EXTENSIONS.get(subtype, subtype)
+    if kind != "image" or not re.fullmatch("[a-z0-9]{2,5}", ext):
+        raise BadDataURI(f"bad mime type {params[0]!r}")
+    return ext, "base64" in params[1:], comma + 1
+
+def decode_chunks(data, start, is_base64, chunk_size=CHUNK_SIZE):
+    """Yield decoded payload a chunk at a time"""
+    if not is_base64:
+        yield unquote_to_bytes(data[start:])
+        return
+    if WHITESPACE.search(data, start):
+        data, start = WHITESPACE.sub("", data[start:]), 0
+    chunk_size -= chunk_size % 4
+    end = len(data)
+    for i in range(start, end, chunk_size):
+        chunk = data[i:i + chunk_size]
+        if i + chunk_size >= end: chunk += "=" * (-len(chunk) % 4)
+        yield base64.b64decode(chunk, validate=True)
+
+def check_complete(head, tail):
+    """Reject non images and known formats missing their end marker"""
+    kind = sniff_type(head)
+    if kind and not kind.startswith("image/"):
+        raise BadDataURI(f"not an image ({kind})")
+    if kind in TRAILERS and not tail.endswith(TRAILERS[kind]):
+        raise BadDataURI(f"truncated {kind}")
+    return kind
+
+def decode_to_temp(data, folder, chunk_size=CHUNK_SIZE):
+    """Decode data uri straight to a temp file in folder, return (temp path, extension).
+    Extension comes from the decoded bytes when known, else from the mime type."""
+    ext, is_base64, start = parse_data_uri(data)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".", suffix=".part")
+    try:
+        head, tail = b"", b""
+        with os.fdopen(fd, "wb") as f:
+            for chunk in decode_chunks(data, start, is_base64, chunk_size):
+                if len(head) < 32: head += chunk[:32]
+                tail = (tail + chunk[-16:])[-16:]
+                f.write(chunk)
+        kind = check_complete(head, tail)
+        if kind.startswith("image/"):
+            ext = EXTENSIONS.get(kind[6:], kind[6:])
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return tmp, ext
+
+def convert_image(src, dest, fmt):
+    """Convert image file with Pillow and remove the original (runs in a worker process)"""
+    from PIL import Image
+    with Image.open(src) as img:
+        if fmt.upper() in ("JPEG", "BMP") and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.save(dest, fmt.upper())
+    os.unlink(src)
+    return dest
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Async Crawl Engine"""
+
+from concurrent.futures import ThreadPoolExecutor
+import scrape
+
+PAGES = 4
+PAGE_DOWNLOADS = 4
+
+def scrape_page(url):
+    """Fetch, parse and save info for one url"""
+    images = scrape.get_paths(url)
+    folder = scrape.make_folder(url)
+    scrape.save_info(images, folder)
+    return images, folder
+
+async def crawl(urls, pages=PAGES, page_downloads=PAGE_DOWNLOADS):
+    """Pipeline page fetches, parsing and image downloads across urls.
+    Bounded queues between stages hold back page fetching while downloads catch up."""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    pages, page_downloads = max(1, pages), max(1, page_downloads)
+    url_queue = asyncio.Queue(maxsize=pages)
+    image_queue = asyncio.Queue(maxsize=page_downloads)
+    done = {"pages": 0, "images": 0}
+
+    async def page_worker(executor):
+        while (job := await url_queue.get()) is not None:
+            i, url = job
+            print("+", url, f'[{i} of {len(urls)}]')
+            try:
+                images, folder = await loop.run_in_executor(executor, scrape_page, url)
+            except Exception:
+                print("\t-XX- ERROR GETTING URL", url)
+                continue
+            await image_queue.put((url, images, folder))
+
+    async def download_worker(executor):
+        while (job := await image_queue.get()) is not None:
+            url, images, folder = job
+            try:
+                ok = await loop.run_in_executor(executor, scrape.download_images, images, folder, url)
+            except Exception:
+                print("\t-XX- ERROR DOWNLOADING IMAGES", url)
+                continue
+            done["images"] += ok
+            done["pages"] += 1
+
+    with ThreadPoolExecutor(pages, "scrape-page") as page_exec, \
+            ThreadPoolExecutor(page_downloads, "scrape-wait") as download_exec:
+        page_tasks = [asyncio.create_task(page_worker(page_exec)) for _ in range(pages)]
+        download_tasks = [asyncio.create_task(download_worker(download_exec)) for _ in range(page_downloads)]
+        for job in enumerate(urls, 1):
+            await url_queue.put(job)
+        for _ in page_tasks:
+            await url_queue.put(None)
+        await asyncio.gather(*page_tasks)
+        for _ in download_tasks:
+            await image_queue.put(None)
+        await asyncio.gather(*download_tasks)
+    return done
+
+def loop_urls(urls, pages=PAGES, page_downloads=PAGE_DOWNLOADS):
+    """Loop list of urls with the async engine"""
+    import asyncio
+    print()
+    print(f'--- Starting {len(urls)} Item(s) (async) ---')
+    print()
+    done = asyncio.run(crawl(urls, pages, page_downloads))
+    print()
+    print(f'--- Finished {done["pages"]} Item(s), {done["images"]} Image(s) ---')
+    return done
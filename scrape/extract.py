@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Single Pass Image Url Extraction"""
+
+from html.parser import HTMLParser
+import re
+
+SRCSET_URL = re.compile(r"[\s,]*([^\s,]\S*)")
+STYLE_URL = re.compile(r"background(?:-image)?\s*:[^;{}]*?url\(\s*[\"']?([^\"')]*?)[\"']?\s*\)", re.I)
+
+def find_attr_url(string):
+    """Find background-image url in style"""
+    #TEST test_find_attr_url
+    for part in string.split(";"):
+        if "background-image" in part:
+            img = re.findall(r"\([\"']?(.*?)[\"']?\)", part)
+            return img[0] if img else ""
+    return ""
+
+def srcset_url(string):
+    """Pick largest candidate from srcset"""
+    #TEST test_srcset_url
+    if string.startswith("data:"): return string
+    best, best_size, pos = "", -1, 0
+    while m := SRCSET_URL.match(string, pos):
+        url, pos = m.group(1), m.end()
+        if url.endswith(","):
+            url, descriptors = url.rstrip(","), []
+        else:
+            #descriptors run to the next comma, commas inside the url are kept
+            end = string.find(",", pos)
+            end = len(string) if end < 0 else end
+            descriptors, pos = string[pos:end].split(), end + 1
+        try:
+            size = float(descriptors[0][:-1]) if descriptors else 1
+        except ValueError:
+            size = 1
+        if size > best_size:
+            best, best_size = url, size
+    return best
+
+def style_urls(text):
+    """Find background urls in a style block"""
+    #TEST test_style_urls
+    return [img for img in STYLE_URL.findall(text) if img]
+
+def attr_url(attr, value):
+    """Get image url from attribute value"""
+    if attr == "style": return find_attr_url(value)
+    if attr.endswith("srcset"): return srcset_url(value)
+    return value
+
+class ImageParser(HTMLParser):
+    """Collect image urls from tags/attrs and style blocks, and link hrefs, in one pass"""
+
+    def __init__(self, tags):
+        super().__init__(convert_charrefs=True)
+        self.tags = tags
+        self.found = []
+        self.links = []
+        self.style = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "style":
+            self.style = []
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href: self.links.append(href)
+        if tag not in self.tags: return
+        attrs = dict(attrs)
+        for attr in self.tags[tag]:
+            value = attrs.get(attr)
+            if value: self.found.append(attr_url(attr, value))
+
+    def handle_data(self, data):
+        if self.style is not None: self.style.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "style" and self.style is not None:
+            self.found.extend(style_urls("".join(self.style)))
+            self.style = None
+
+def stream_paths(html, url, tags, fix, links=None):
+    """Find image paths in html with a single streaming pass, add raw hrefs to links if given"""
+    #TEST test_stream_paths
+    parser = ImageParser(tags)
+    parser.feed(html)
+    parser.close()
+    if links is not None: links.extend(parser.links)
+    return [p for p in (fix(img, url) for img in parser.found) if p]
+
+def compare(pages, rounds=20):
+    """Time each registered parser over html pages, return pages/sec"""
+    import scrape
+    from timeit import default_timer as timer
+    results = {}
+    for name in scrape.PARSERS:
+        start = timer()
+        for _ in range(rounds):
+            for html in pages:
+                scrape.PARSERS[name](html, "http://example.com")
+        results[name] = round(rounds * len(pages) / (timer() - start), 2)
+    return results
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Content Addressed Image Index"""
+
+from threading import Lock
+import sqlite3
+import os
+
+INDEX_FILE = ".scrape_index.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, hash TEXT NOT NULL, folder TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS files_hash ON files (hash, folder);
+"""
+
+class ImageIndex:
+    """Persistent url -> sha256 -> stored files map, shared by all threads"""
+
+    def __init__(self, path):
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder): os.makedirs(folder)
+        self.path = path
+        self._lock = Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def url_hash(self, url):
+        """Get content hash of an already fetched url"""
+        with self._lock:
+            row = self._db.execute("SELECT hash FROM urls WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def find(self, digest, folder=None):
+        """Get a stored file with this hash (in folder if given), drop missing files"""
+        query, args = "SELECT path FROM files WHERE hash = ?", (digest,)
+        if folder is not None:
+            query, args = query + " AND folder = ?", args + (os.path.abspath(folder),)
+        with self._lock:
+            paths = [row[0] for row in self._db.execute(query, args)]
+            for path in paths:
+                if os.path.isfile(path): return path
+                self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+            if paths: self._db.commit()
+        return None
+
+    def add_url(self, url, digest):
+        """Remember url content hash"""
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, digest))
+
+    def add_file(self, path, digest):
+        """Remember stored file content hash"""
+        path = os.path.abspath(path)
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)", (path, digest, os.path.dirname(path)))
+
+    def close(self):
+        """Close database"""
+        with self._lock:
+            self._db.close()
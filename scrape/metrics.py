@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Run Metrics"""
+
+from collections import defaultdict
+from threading import Lock
+import json
+import time
+import os
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def response_retries(response):
+    """Count urllib3 retries behind a response"""
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    return len(retries.history) if retries else 0
+
+def escape(value):
+    """Escape prometheus label value"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def labels_text(labels):
+    """Format prometheus labels"""
+    #TEST test_labels_text
+    if not labels: return ""
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+class Metrics:
+    """Per url/image phase timings, byte/retry/error counts, json lines log and hooks"""
+
+    def __init__(self, log=None, prom=None, buckets=BUCKETS):
+        self.log = log
+        self.prom = prom
+        self.buckets = buckets
+        self.hooks = []
+        self._lock = Lock()
+        self._log = open(log, "a", buffering=1) if log else None
+        self._hist = defaultdict(lambda: [0] * (len(buckets) + 2))
+        self._counts = defaultdict(int)
+
+    def add_hook(self, fn):
+        """Call fn(event dict) for every event"""
+        self.hooks.append(fn)
+
+    def event(self, kind, url, phases, size=0, retries=0, error=None, **fields):
+        """Record one page/image/connect event"""
+        record = {"time": round(time.time(), 3), "event": kind, "url": url,
+                "phases": {k: round(v, 6) for k, v in phases.items()},
+                "bytes": size, "retries": retries, "error": error, **fields}
+        with self._lock:
+            for phase, seconds in phases.items():
+                self._observe((("kind", kind), ("phase", phase)), seconds)
+            self._counts[("scrape_events_total", (("kind", kind), ("result", fields.get("result", "error" if error else "ok"))))] += 1
+            if size: self._counts[("scrape_bytes_total", (("kind", kind),))] += size
+            if retries: self._counts[("scrape_retries_total", (("kind", kind),))] += retries
+            if error: self._counts[("scrape_errors_total", (("kind", kind), ("type", error)))] += 1
+            if self._log: self._log.write(json.dumps(record) + "\n")
+        for hook in self.hooks:
+            hook(record)
+
+    def connected(self, host, seconds):
+        """Record new connection (dns, tcp and tls) time"""
+        self.event("connect", host, {"connect": seconds})
+
+    def _observe(self, labels, seconds):
+        """Add to phase histogram"""
+        hist = self._hist[labels]
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound: hist[i] += 1
+        hist[-2] += 1
+        hist[-1] += seconds
+
+    def prometheus(self):
+        """Get metrics as prometheus text"""
+        lines = ["# HELP scrape_phase_seconds Time spent per phase",
+                "# TYPE scrape_phase_seconds histogram"]
+        with self._lock:
+            for labels, hist in sorted(self._hist.items()):
+                for bound, count in zip(self.buckets + ("+Inf",), hist[:-1]):
+                    lines.append(f"scrape_phase_seconds_bucket{labels_text(labels + (('le', bound),))} {count}")
+                lines.append(f"scrape_phase_seconds_sum{labels_text(labels)} {hist[-1]:.6f}")
+                lines.append(f"scrape_phase_seconds_count{labels_text(labels)} {hist[-2]}")
+            typed = set()
+            for (name, labels), value in sorted(self._counts.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{labels_text(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=None):
+        """Write prometheus text file (atomic, for node_exporter textfile collector)"""
+        path = path or self.prom
+        if not path: return
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def close(self):
+        """Write prometheus file and close log"""
+        self.write_prometheus()
+        with self._lock:
+            if self._log: self._log.close()
+            self._log = None
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Bounded Download Pool"""
+
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import deque, defaultdict
+from threading import Lock, BoundedSemaphore
+from urllib.parse import urlsplit
+
+WORKERS = 8
+PER_HOST = 4
+MAX_IN_FLIGHT = 64
+
+def url_host(url):
+    """Get host key for url (empty for data uris)"""
+    #TEST test_url_host
+    if not url or url.startswith("data:"): return ""
+    return urlsplit(url).netloc.lower()
+
+class DownloadPool:
+    """Fixed size worker pool with per host and global in-flight limits"""
+
+    def __init__(self, workers=WORKERS, per_host=PER_HOST, max_in_flight=MAX_IN_FLIGHT):
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.max_in_flight = max(1, max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scrape")
+        self._in_flight = BoundedSemaphore(self.max_in_flight)
+        self._lock = Lock()
+        self._active = defaultdict(int)
+        self._pending = defaultdict(deque)
+
+    def submit(self, fn, url, *args):
+        """Queue fn(*args) for url, blocks while the in-flight cap is reached"""
+        self._in_flight.acquire()
+        future = Future()
+        host = url_host(url)
+        with self._lock:
+            self._pending[host].append((future, fn, args))
+        self._dispatch(host)
+        return future
+
+    def _dispatch(self, host):
+        """Hand pending jobs for host to the workers while under its limit"""
+        with self._lock:
+            pending = self._pending[host]
+            while pending and (not host or self._active[host] < self.per_host):
+                self._active[host] += 1
+                self._executor.submit(self._run, host, *pending.popleft())
+            if not pending:
+                del self._pending[host]
+
+    def _run(self, host, future, fn, args):
+        """Run one job and pass the result to its future"""
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                self._active[host] -= 1
+                if not self._active[host]:
+                    del self._active[host]
+            self._in_flight.release()
+            self._dispatch(host)
+
+    def shutdown(self, wait=True):
+        """Stop worker threads"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Image Header Probe"""
+
+from scrape.stream import SkipDownload, sniff_type
+from scrape.datauri import EXTENSIONS
+import struct
+
+PROBE_SIZE = 64 * 1024
+SNIFF_SIZE = 32
+JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+JPEG_STANDALONE = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8, 0xD9}
+
+def image_format(kind):
+    """Short format name from mime type (image/jpeg -> jpeg)"""
+    #TEST test_image_format
+    subtype = kind.partition("/")[2]
+    return EXTENSIONS.get(subtype, subtype)
+
+def jpeg_size(head):
+    """Walk jpeg segments up to the frame header"""
+    i = 2
+    while i + 9 <= len(head):
+        if head[i] != 0xFF: return None
+        marker = head[i + 1]
+        if marker == 0xFF:
+            i += 1
+        elif marker in JPEG_STANDALONE:
+            i += 2
+        elif marker in JPEG_SOF:
+            height, width = struct.unpack(">HH", head[i + 5:i + 9])
+            return width, height
+        else:
+            i += 2 + struct.unpack(">H", head[i + 2:i + 4])[0]
+    return None
+
+def webp_size(head):
+    """Read size from VP8, VP8L or VP8X chunk"""
+    chunk = head[12:16]
+    if chunk == b"VP8 " and len(head) >= 30:
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(head) >= 25:
+        bits = struct.unpack("<I", head[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(head) >= 30:
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+def image_size(head, kind=None):
+    """Get (width, height) from the first bytes of an image, None if unknown or too short"""
+    #TEST test_image_size
+    kind = kind or sniff_type(head)
+    if kind == "image/png" and len(head) >= 24 and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    if kind == "image/gif" and len(head) >= 10:
+        return struct.unpack("<HH", head[6:10])
+    if kind == "image/jpeg":
+        return jpeg_size(head)
+    if kind == "image/webp":
+        return webp_size(head)
+    if kind == "image/bmp" and len(head) >= 26:
+        if struct.unpack("<I", head[14:18])[0] == 12: return struct.unpack("<HH", head[18:22])
+        width, height = struct.unpack("<ii", head[18:26])
+        return width, abs(height)
+    if kind == "image/x-icon" and len(head) >= 8:
+        return head[6] or 256, head[7] or 256
+    return None
+
+class ImageFilter:
+    """Skip images by format, byte size and dimensions read from the first bytes.
+    Limits of 0 are off, images whose size can't be read pass the dimension checks."""
+
+    def __init__(self, min_width=0, max_width=0, min_height=0, max_height=0, min_size=0, formats=(), probe_size=PROBE_SIZE):
+        self.min_width = min_width
+        self.max_width = max_width
+        self.min_height = min_height
+        self.max_height = max_height
+        self.min_size = min_size
+        self.formats = tuple(EXTENSIONS.get(f.lower(), f.lower()) for f in formats)
+        self.probe_size = probe_size
+
+    @property
+    def dimensions(self):
+        return bool(self.min_width or self.max_width or self.min_height or self.max_height)
+
+    @property
+    def probes(self):
+        """Check if first bytes need reading before the image is written"""
+        return bool(self.formats or self.dimensions)
+
+    def check_length(self, response):
+        """Reject early from Content-Length"""
+        length = response.headers.get("Content-Length", "")
+        if self.min_size and length.isdigit() and int(length) < self.min_size:
+            raise SkipDownload(f"too small ({length} bytes)")
+
+    def check_size(self, size):
+        """Reject finished download under min size"""
+        if self.min_size and size < self.min_size:
+            raise SkipDownload(f"too small ({size} bytes)")
+
+    def check_head(self, head, done=False):
+        """Check format and dimensions, True once head is enough to decide (done = no more bytes)"""
+        #TEST test_check_head
+        if len(head) < SNIFF_SIZE and not done: return False
+        kind = sniff_type(head)
+        if self.formats and image_format(kind) not in self.formats:
+            raise SkipDownload(f"format {image_format(kind) or 'unknown'}")
+        if not self.dimensions: return True
+        size = image_size(head, kind)
+        if size is None: return done or len(head) >= self.probe_size
+        width, height = size
+        if width < self.min_width or height < self.min_height:
+            raise SkipDownload(f"too small ({width}x{height})")
+        if (self.max_width and width > self.max_width) or (self.max_height and height > self.max_height):
+            raise SkipDownload(f"too large ({width}x{height})")
+        return True
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Pooled HTTP Session"""
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from time import perf_counter
+import requests
+
+POOL_SIZE = 10
+HOST_POOLS = 32
+TIMEOUT = 10
+RETRIES = 2
+BACKOFF = 0.3
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+def timed_pool(pool_cls, conn_cls, on_connect):
+    """Make a connection pool class that reports connect (dns, tcp, tls) time"""
+    class TimedConnection(conn_cls):
+        def connect(self):
+            start = perf_counter()
+            super().connect()
+            on_connect(self.host, perf_counter() - start)
+    return type(f"Timed{pool_cls.__name__}", (pool_cls,), {"ConnectionCls": TimedConnection})
+
+class TimedAdapter(HTTPAdapter):
+    """Adapter whose new connections call on_connect(host, seconds)"""
+
+    def __init__(self, on_connect, **kwargs):
+        self.on_connect = on_connect
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": timed_pool(HTTPConnectionPool, HTTPConnection, self.on_connect),
+            "https": timed_pool(HTTPSConnectionPool, HTTPSConnection, self.on_connect),
+        }
+
+class ScrapeSession(requests.Session):
+    """Keep-alive session with default headers, timeout and retries.
+    One instance is shared by all threads; urllib3 keeps a connection pool per host.
+    on_connect(host, seconds) is called for each new connection if given."""
+
+    def __init__(self, headers=None, pool_size=POOL_SIZE, timeout=TIMEOUT, retries=RETRIES, on_connect=None):
+        super().__init__()
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retries = retries
+        if headers: self.headers.update(headers)
+        retry = Retry(total=retries, connect=retries, read=retries, backoff_factor=BACKOFF,
+                status_forcelist=RETRY_STATUS, allowed_methods=("GET", "HEAD"), raise_on_status=False)
+        pools = dict(pool_connections=HOST_POOLS, pool_maxsize=max(1, pool_size), max_retries=retry)
+        adapter = TimedAdapter(on_connect, **pools) if on_connect else HTTPAdapter(**pools)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    def request(self, method, url, **kwargs):
+        """Add default timeout"""
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import pytest
+from threading import Thread
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+PNG = bytes.fromhex("89504e470d0a1a0a0000000d4948445200000001000000010802000000907753de"
+        "0000000c4944415408d763f8cfc0000003010100c9fe92ef0000000049454e44ae426082")
+PAGE = "<html><body>{}</body></html>"
+ETAG = '"v1"'
+
+class Handler(BaseHTTPRequestHandler):
+    """Local stand-in site: /page... serves html, anything else a png"""
+    protocol_version = "HTTP/1.1"
+    ports = set()
+    requests = []
+
+    def do_GET(self):
+        Handler.ports.add(self.client_address[1])
+        Handler.requests.append(self.path)
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.startswith("/page"):
+            links = "<a href='/page/a'>a</a><a href='/page/b#top'>b</a><a href='http://elsewhere.com/'>x</a>"
+            body = PAGE.format("".join(f"<img src='img{i}.png'>" for i in range(3)) + links).encode()
+            kind = "text/html"
+        else:
+            body, kind = PNG, "image/png"
+        self.send_response(200)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    Handler.ports.clear()
+    Handler.requests.clear()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
@@ -52,7 +52,7 @@ def test_http_fix(url, expected):
 def test_find_attr_url(string, expected):
     assert expected == find_attr_url(string)
 
-@pytest.mark.parametrize("html, url, expected", [
+SEARCH_CASES = [
     #fail
     ("", "", []),
     ("<source style='background-image: url(should_fail.jpg)'>", "fail.com", []),
@@ -86,12 +86,18 @@ def test_find_attr_url(string, expected):
         'add_me.com/find_me7.jpg',
         'http://newsite.com/find_me8.jpg',
         ]),
-])
+]
+
+@pytest.mark.parametrize("html, url, expected", SEARCH_CASES)
 def test_search_tags(html, url, expected):
     soup = BeautifulSoup(html, "html.parser")
     paths = search_tags(soup, url)
     assert set(paths) == set(expected)
 
+@pytest.mark.parametrize("html, url, expected", SEARCH_CASES)
+def test_parse_stream(html, url, expected):
+    assert set(parse_stream(html, url)) == set(expected)
+
 # @pytest.mark.parametrize("url, images", [
 #     ("http://pypi.org", ["logo-small.95de8436.svg", "logo-large.6bdbb439.svg"]), 
 #     ("http://pypi.org/help", ["logo-small.95de8436.svg",]), 
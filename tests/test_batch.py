@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import scrape
+from scrape.batch import *
+
+def test_read_urls():
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        path = os.path.join(tmp_folder, "urls.txt")
+        with open(path, "w") as f:
+            f.write("http://site.com/a\n\n# comment\n  http://site.com/b  \n")
+        assert list(read_urls(path)) == ["http://site.com/a", "http://site.com/b"]
+
+def test_load_journal():
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        path = os.path.join(tmp_folder, "journal")
+        assert load_journal(path) == set()
+        with open(path, "w") as f:
+            f.write("http://site.com/a\n")
+        done = load_journal(path)
+        assert url_key("site.com/a") in done and url_key("http://site.com/b") not in done
+
+def test_run_batch(server, monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        monkeypatch.setattr(scrape, "ROOT_FOLDER", tmp_folder)
+        path = os.path.join(tmp_folder, "urls.txt")
+        journal = os.path.join(tmp_folder, "journal")
+        with open(path, "w") as f:
+            f.write(f"{server}/page/1\n{server}/page/2\nhttp://127.0.0.1:1/page\n")
+        assert run_batch(path, 2, journal) == {"done": 2, "failed": 1, "skipped": 0}
+        with open(path, "a") as f:
+            f.write(f"{server}/page/3\n")
+        assert run_batch(path, 2, journal) == {"done": 1, "failed": 1, "skipped": 2}
+        assert len(load_journal(journal)) == 3
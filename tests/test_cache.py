@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+import pytest
+import os
+import tempfile
+import scrape
+from conftest import Handler
+from scrape.cache import *
+from scrape import *
+
+@pytest.mark.parametrize("entry, expected", [
+    (None, {}),
+    ({"etag": '"abc"', "modified": None}, {"If-None-Match": '"abc"'}),
+    ({"etag": None, "modified": "Wed, 21 Oct 2015 07:28:00 GMT"}, {"If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT"}),
+])
+def test_conditional_headers(entry, expected):
+    assert expected == conditional_headers(entry)
+
+def test_cache_lru():
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        cache = HTTPCache(os.path.join(tmp_folder, CACHE_FOLDER), max_size=100)
+        for i in range(5):
+            cache.put_page(f"http://a.com/{i}", {"ETag": f'"{i}"'}, ["x" * 30])
+        cache.put_page("http://a.com/none", {}, ["no validators"])
+        assert cache.size <= 100
+        assert cache.get("http://a.com/0") is None
+        assert cache.get("http://a.com/none") is None
+        assert cache.page_paths(cache.get("http://a.com/4")) == ["x" * 30]
+        cache.close()
+
+def test_cache_not_modified(server, monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        monkeypatch.setattr(scrape, "ROOT_FOLDER", tmp_folder)
+        monkeypatch.setattr(scrape, "CACHE", None)
+        setup_cache()
+        folder = make_folder("page")
+        paths = get_paths(f"{server}/page")
+        for img in paths:
+            save_image_contents(img, folder)
+        #second run gets 304s, same paths, no duplicate files
+        del Handler.requests[:]
+        assert get_paths(f"{server}/page") == paths
+        for img in paths:
+            save_image_contents(img, folder)
+        assert len(Handler.requests) == 1 + len(paths)
+        assert sorted(os.listdir(folder)) == ["img0.png", "img1.png", "img2.png"]
+        #new folder gets a linked copy
+        other = make_folder("other")
+        for _ in range(2):
+            save_image_contents(paths[0], other)
+            assert os.listdir(other) == ["img0.png"]
+        scrape.CACHE.close()
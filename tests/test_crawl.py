@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+import pytest
+import os
+import tempfile
+import scrape
+from scrape.crawl import *
+from scrape import *
+
+@pytest.mark.parametrize("link, url, expected", [
+    ("", "http://site.com/a/", ""),
+    ("#top", "http://site.com/a/", ""),
+    ("mailto:me@site.com", "http://site.com/a/", ""),
+    ("b.html", "http://site.com/a/", "http://site.com/a/b.html"),
+    ("/b.html?x=1#top", "http://site.com/a/index.html", "http://site.com/b.html?x=1"),
+    ("?page=2", "http://site.com/list?page=1", "http://site.com/list?page=2"),
+    ("/item?id=17", "http://site.com/", "http://site.com/item?id=17"),
+    ("/multi\nline.html", "http://site.com/", "http://site.com/multiline.html"),
+    ("https://other.com/", "http://site.com/", "http://other.com/"),
+    ("//cdn.site.com/x", "http://site.com/", "http://cdn.site.com/x"),
+])
+def test_link_fix(link, url, expected):
+    assert expected == link_fix(link, url)
+
+@pytest.mark.parametrize("url, expected", [
+    ("http://Site.com/a", "site.com"),
+    ("http://www.site.com/a", "site.com"),
+])
+def test_site_host(url, expected):
+    assert expected == site_host(url)
+
+@pytest.mark.parametrize("link, expected", [
+    ("http://site.com/about", True),
+    ("http://www.site.com/about", True),
+    ("http://site.com/logo.PNG", False),
+    ("http://other.com/about", False),
+])
+def test_follow_link(link, expected):
+    assert expected == follow_link(link, {"site.com"})
+
+def test_bloom_filter():
+    bloom = BloomFilter(1000, 0.01)
+    assert bloom.add("http://site.com/1")
+    assert not bloom.add("http://site.com/1")
+    assert "http://site.com/1" in bloom
+    added = sum(bloom.add(f"http://site.com/{i}") for i in range(2, 1000))
+    assert added >= 990 and len(bloom) == added + 1
+    misses = sum(f"http://other.com/{i}" in bloom for i in range(1000))
+    assert misses < 50
+
+def test_frontier():
+    frontier = Frontier()
+    for i in range(3): frontier.push(f"http://site.com/{i}")
+    assert len(frontier) == 3
+    assert list(frontier) == ["http://site.com/0", "http://site.com/1", "http://site.com/2"]
+    frontier.push("http://site.com/a\r\nb")
+    assert len(frontier) == 4 and list(frontier)[-1] == "http://site.com/ab"
+    frontier.close()
+
+@pytest.mark.parametrize("depth, max_pages, expected", [
+    (0, 10, 1),
+    (1, 10, 3),
+    (2, 10, 3),
+    (1, 2, 2),
+])
+def test_crawl_site(server, monkeypatch, depth, max_pages, expected):
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        monkeypatch.setattr(scrape, "ROOT_FOLDER", tmp_folder)
+        assert crawl_site([f"{server}/page"], depth, max_pages) == expected
+        assert len(os.listdir(tmp_folder)) == expected
+
+def test_crawl_error(server, monkeypatch):
+    make_folder = scrape.make_folder
+    def bad_folder(url):
+        if url.endswith("/page/a"): raise OSError(36, "File name too long")
+        return make_folder(url)
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        monkeypatch.setattr(scrape, "ROOT_FOLDER", tmp_folder)
+        monkeypatch.setattr(scrape, "make_folder", bad_folder)
+        assert crawl_site([f"{server}/page"], 1, 10) == 3
+        assert sorted(os.listdir(tmp_folder)) == sorted(scrape.string_fix(f"{server}/page{p}") for p in ("", "/b"))
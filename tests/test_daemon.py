@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+
+import pytest
+import os
+import io
+import sys
+import tempfile
+import subprocess
+from threading import Thread
+import scrape
+from scrape.daemon import *
+
+def test_lazy_imports():
+    code = "import sys, scrape; from scrape import engine, crawl, batch, daemon; print(sorted({'bs4', 'requests', 'PIL', 'asyncio'} & set(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+def test_daemon(server, monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        monkeypatch.setattr(scrape, "ROOT_FOLDER", tmp_folder)
+        daemon = make_server()
+        Thread(target=daemon.serve_forever, daemon=True).start()
+        path = daemon.server_address
+        out = io.StringIO()
+        assert submit({"urls": [f"{server}/page1"]}, path, out) == {"pages": 1}
+        assert "3/3 Images Downloaded" in out.getvalue()
+        assert submit({"urls": [f"{server}/page2"], "mode": "async"}, path, out)["images"] == 3
+        with pytest.raises(RuntimeError):
+            submit({"urls": [], "mode": "nope"}, path, out)
+        with pytest.raises(RuntimeError):
+            make_server(path)
+        daemon.shutdown()
+        daemon.server_close()
+        assert not os.path.exists(path)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import pytest
+import os
+import base64
+import tempfile
+from conftest import PNG
+from scrape.datauri import *
+from scrape import *
+
+PNG_URI = "data:image/png;base64," + base64.b64encode(PNG).decode()
+
+@pytest.mark.parametrize("data, expected", [
+    ("data:image/png;base64,AAAA", ("png", True, 22)),
+    ("data:image/jpg;base64,AAAA", ("jpeg", True, 22)),
+    ("data:image/svg+xml;charset=utf-8,%3Csvg%3E", ("svg", False, 33)),
+])
+def test_parse_data_uri(data, expected):
+    assert expected == parse_data_uri(data)
+
+@pytest.mark.parametrize("data", [
+    "data:image/;base64,AAAA",
+    "data:text/html;base64,AAAA",
+    "http://site.com/a.png",
+])
+def test_parse_data_uri_fail(data):
+    with pytest.raises(BadDataURI):
+        parse_data_uri(data)
+
+@pytest.mark.parametrize("data, ext", [
+    (PNG_URI, "png"),
+    (PNG_URI.rstrip("="), "png"), #missing padding
+    (PNG_URI[:40] + "\n" + PNG_URI[40:], "png"), #wrapped
+    (PNG_URI.replace("image/png", "image/jpeg"), "png"), #mislabeled
+    ("data:image/svg+xml,%3Csvg%20xmlns%3D%22http%3A//www.w3.org/2000/svg%22/%3E", "svg"),
+])
+def test_decode_to_temp(data, ext):
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        tmp, found = decode_to_temp(data, tmp_folder, chunk_size=8)
+        assert found == ext
+        with open(tmp, "rb") as f:
+            assert f.read() == (PNG if ext == "png" else b'<svg xmlns="http://www.w3.org/2000/svg"/>')
+
+def test_decode_to_temp_truncated():
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        with pytest.raises(BadDataURI):
+            decode_to_temp(PNG_URI[:60], tmp_folder)
+        assert os.listdir(tmp_folder) == []
+
+def test_save_image_data_convert():
+    setup_convert("jpg", 1)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_folder:
+            save_image_data(PNG_URI, tmp_folder)
+            assert os.listdir(tmp_folder) == ["data_image.jpeg"]
+        with tempfile.TemporaryDirectory() as tmp_folder:
+            save_image_data("data:image/svg+xml;utf8,<svg xmlns='http://www.w3.org/2000/svg'></svg>", tmp_folder)
+            assert os.listdir(tmp_folder) == ["data_image.svg"]
+    finally:
+        setup_convert(None)
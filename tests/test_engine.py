@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+
+import pytest
+import os
+import asyncio
+import tempfile
+import scrape
+from scrape import engine
+
+@pytest.mark.parametrize("pages, page_downloads", [
+    (1, 1),
+    (4, 2),
+])
+def test_crawl(server, monkeypatch, pages, page_downloads):
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        monkeypatch.setattr(scrape, "ROOT_FOLDER", tmp_folder)
+        urls = [f"{server}/page{i}" for i in range(5)]
+        done = asyncio.run(engine.crawl(urls, pages, page_downloads))
+        assert done == {"pages": 5, "images": 15}
+        for url in urls:
+            folder = os.path.join(tmp_folder, scrape.string_fix(url))
+            assert sorted(os.listdir(folder)) == [scrape.INFO_FILE, "img0.png", "img1.png", "img2.png"]
+
+def test_crawl_error(server, monkeypatch):
+    make_folder = scrape.make_folder
+    def bad_folder(url):
+        if url.endswith("page2"): raise OSError("File name too long")
+        return make_folder(url)
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        monkeypatch.setattr(scrape, "ROOT_FOLDER", tmp_folder)
+        monkeypatch.setattr(scrape, "make_folder", bad_folder)
+        urls = [f"{server}/page{i}" for i in range(5)]
+        done = asyncio.run(asyncio.wait_for(engine.crawl(urls, 1, 1), 10))
+        assert done == {"pages": 4, "images": 12}
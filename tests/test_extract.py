@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import pytest
+from scrape.extract import *
+from scrape import *
+
+@pytest.mark.parametrize("string, expected", [
+    ("", ""),
+    ("one.jpg", "one.jpg"),
+    ("one.jpg 1x, two.jpg 2x", "two.jpg"),
+    ("big.jpg 1200w, small.jpg 320w", "big.jpg"),
+    ("  a.jpg 320w,\n  b.jpg 640w  ", "b.jpg"),
+    ("data:image/png;base64,AAAA", "data:image/png;base64,AAAA"),
+    ("/c/w_200,h_100/a.jpg 1x, /c/w_400,h_200/a.jpg 2x", "/c/w_400,h_200/a.jpg"),
+    ("/c/w_400,h_200/a.jpg, /c/w_200,h_100/b.jpg", "/c/w_400,h_200/a.jpg"), #no descriptors
+    ("a.jpg 1x,b.jpg 2x", "b.jpg"),
+])
+def test_srcset_url(string, expected):
+    assert expected == srcset_url(string)
+
+@pytest.mark.parametrize("text, expected", [
+    ("", []),
+    (".a { color: red }", []),
+    (".a { background-image: url('one.png') }", ["one.png"]),
+    (".a { background: #fff url(two.png) no-repeat } .b { background-image:url(\"three.png\") }", ["two.png", "three.png"]),
+])
+def test_style_urls(text, expected):
+    assert expected == style_urls(text)
+
+@pytest.mark.parametrize("html, url, expected", [
+    ("", "", []),
+    ("<source style='background-image: url(should_fail.jpg)'>", "fail.com", []),
+    ("<img src='find_me.jpg' data-src='me_too.png'>", "add_me.com",
+        ['add_me.com/me_too.png', 'add_me.com/find_me.jpg']),
+    ("<picture><source srcset='s.jpg 1x, l.jpg 2x'><img src='i.jpg'></picture>", "add_me.com",
+        ['add_me.com/l.jpg', 'add_me.com/i.jpg']),
+    ("<style>.a{background-image:url(/bg.png)}</style><div style=\"background-image: url('d.jpg')\"></div>", "add_me.com",
+        ['add_me.com/bg.png', 'add_me.com/d.jpg']),
+    ("<IMG SRC='upper.jpg'><img data-lazyload='a&amp;b.jpg'>", "add_me.com",
+        ['add_me.com/upper.jpg', 'add_me.com/a&b.jpg']),
+])
+def test_stream_paths(html, url, expected):
+    assert expected == parse_stream(html, url)
+    assert set(expected) == set(parse_soup(html, url))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+import pytest
+import os
+import errno
+import tempfile
+import scrape
+from conftest import Handler
+from scrape.index import *
+from scrape import *
+
+def test_make_img_name():
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        open(os.path.join(tmp_folder, "logo.png"), "w").close()
+        names = [make_img_name(os.path.join(tmp_folder, "logo.png")) for _ in range(3)]
+        assert [os.path.basename(n) for n in names] == ["logo1.png", "logo2.png", "logo3.png"]
+        assert os.path.basename(make_img_name(os.path.join(tmp_folder, "new.png"))) == "new.png"
+
+def test_move_into_place():
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        name = os.path.join(tmp_folder, "logo.png")
+        assert make_img_name(name) == name
+        #made after the folder was listed (other process, user)
+        for existing in ("logo.png", "logo1.png"):
+            with open(os.path.join(tmp_folder, existing), "w") as f: f.write("keep")
+        tmp = os.path.join(tmp_folder, ".part")
+        with open(tmp, "w") as f: f.write("new")
+        assert os.path.basename(move_into_place(tmp, name)) == "logo2.png"
+        for existing in ("logo.png", "logo1.png"):
+            with open(os.path.join(tmp_folder, existing)) as f: assert f.read() == "keep"
+        forget_names(tmp_folder)
+        assert tmp_folder not in scrape.NAMES
+
+def test_link_into_place(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        src = os.path.join(tmp_folder, "src.png")
+        with open(src, "w") as f: f.write("new")
+        name = os.path.join(tmp_folder, "logo.png")
+        make_img_name(os.path.join(tmp_folder, "other.png"))
+        with open(name, "w") as f: f.write("keep")
+        assert os.path.basename(link_into_place(src, name)) == "logo1.png"
+        def no_link(src, dest): raise OSError(errno.EXDEV, "cross device")
+        monkeypatch.setattr(os, "link", no_link)
+        copy = link_into_place(src, name)
+        assert os.path.basename(copy) == "logo2.png"
+        with open(name) as f: assert f.read() == "keep"
+        with open(copy) as f: assert f.read() == "new"
+        forget_names(tmp_folder)
+
+def test_image_index():
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        path = os.path.join(tmp_folder, "one.png")
+        open(path, "w").close()
+        index = ImageIndex(os.path.join(tmp_folder, INDEX_FILE))
+        index.add_url("http://a.com/one.png", "abc")
+        index.add_file(path, "abc")
+        assert index.url_hash("http://a.com/one.png") == "abc"
+        assert index.url_hash("http://a.com/two.png") is None
+        assert index.find("abc") == path
+        assert index.find("abc", tmp_folder) == path
+        assert index.find("abc", "/somewhere/else") is None
+        os.unlink(path)
+        assert index.find("abc") is None
+        index.close()
+
+def test_dedup_downloads(server, monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        monkeypatch.setattr(scrape, "ROOT_FOLDER", tmp_folder)
+        monkeypatch.setattr(scrape, "INDEX", None)
+        setup_index()
+        one, two = make_folder("one"), make_folder("two")
+        #same content under two urls is stored once
+        save_image_contents(f"{server}/a.png", one)
+        save_image_contents(f"{server}/b.png", one)
+        assert sorted(os.listdir(one)) == ["a.png"]
+        #known url is linked, not fetched again
+        fetched = len(Handler.requests)
+        save_image_contents(f"{server}/a.png", two)
+        assert len(Handler.requests) == fetched
+        assert os.path.samefile(os.path.join(one, "a.png"), os.path.join(two, "a.png"))
+        scrape.INDEX.close()
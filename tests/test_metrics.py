@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import pytest
+import os
+import json
+import tempfile
+import scrape
+from scrape.metrics import *
+from scrape import *
+
+@pytest.mark.parametrize("labels, expected", [
+    ((), ""),
+    ((("kind", "page"),), '{kind="page"}'),
+    ((("type", 'a"b\\c'), ("le", 0.5)), '{type="a\\"b\\\\c",le="0.5"}'),
+])
+def test_labels_text(labels, expected):
+    assert expected == labels_text(labels)
+
+def test_metrics_export():
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        log, prom = os.path.join(tmp_folder, "m.jsonl"), os.path.join(tmp_folder, "m.prom")
+        metrics = Metrics(log, prom)
+        seen = []
+        metrics.add_hook(seen.append)
+        metrics.event("image", "http://a.com/1.png", {"body": 0.02, "write": 0.001}, size=100, retries=1)
+        metrics.event("image", "http://a.com/2.png", {"total": 0.5}, error="ConnectionError")
+        metrics.close()
+        assert [e["url"] for e in seen] == ["http://a.com/1.png", "http://a.com/2.png"]
+        with open(log) as f:
+            assert [json.loads(line)["bytes"] for line in f] == [100, 0]
+        with open(prom) as f:
+            text = f.read()
+        assert 'scrape_phase_seconds_bucket{kind="image",phase="body",le="0.025"} 1' in text
+        assert 'scrape_phase_seconds_count{kind="image",phase="write"} 1' in text
+        assert 'scrape_bytes_total{kind="image"} 100' in text
+        assert 'scrape_retries_total{kind="image"} 1' in text
+        assert 'scrape_errors_total{kind="image",type="ConnectionError"} 1' in text
+
+def test_metrics_scrape(server, monkeypatch):
+    monkeypatch.setattr(scrape, "METRICS", None)
+    monkeypatch.setattr(scrape, "SESSION", None)
+    events = []
+    setup_metrics().add_hook(events.append)
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        paths = get_paths(f"{server}/page")
+        for img in paths:
+            save_image_contents(img, tmp_folder)
+    kinds = [e["event"] for e in events]
+    assert kinds.count("connect") >= 1
+    assert kinds.count("page") == 1 and kinds.count("image") == 3
+    image = [e for e in events if e["event"] == "image"][0]
+    assert set(image["phases"]) == {"headers", "body", "write"}
+    assert image["bytes"] > 0 and image["result"] == "ok"
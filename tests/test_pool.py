@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import pytest
+import time
+import tempfile
+from threading import Lock
+from scrape.pool import *
+from scrape import *
+
+@pytest.mark.parametrize("url, expected", [
+    ("", ""),
+    ("data:image/png;base64,ABCD", ""),
+    ("http://Site.com/a.jpg", "site.com"),
+    ("http://site.com:8080/a/b.jpg", "site.com:8080"),
+])
+def test_url_host(url, expected):
+    assert expected == url_host(url)
+
+@pytest.mark.parametrize("workers, per_host", [
+    (8, 1),
+    (8, 3),
+    (2, 4),
+])
+def test_pool_per_host(workers, per_host):
+    lock = Lock()
+    running, peak = [0], [0]
+    def job():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+    pool = DownloadPool(workers, per_host, 16)
+    jobs = [pool.submit(job, "http://one.com/img.jpg") for _ in range(12)]
+    for j in jobs: j.result()
+    pool.shutdown()
+    assert peak[0] <= min(workers, per_host)
+
+def test_download_images_count():
+    setup_pool(2, 2, 4)
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        #bad data uri and unreachable url should not count
+        ok = download_images(["data:image/png;base64,!!!!", "http://127.0.0.1:1/fail.jpg"], tmp_folder)
+    assert ok == 0
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import pytest
+import struct
+import os
+import tempfile
+import scrape
+from scrape.probe import *
+from scrape.stream import SkipDownload
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR" + struct.pack(">II", width, height) + b"\x08\x02\x00\x00\x00" + b"\x00" * 20
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    return b"\xff\xd8" + app0 + b"\xff\xc0\x00\x11\x08" + struct.pack(">HH", height, width) + b"\x03" + b"\x00" * 20
+
+GIF = b"GIF89a" + struct.pack("<HH", 1, 1) + b"\x00" * 30
+WEBP = b"RIFF\x00\x00\x00\x00WEBPVP8X\x0a\x00\x00\x00\x00\x00\x00\x00" + (639).to_bytes(3, "little") + (479).to_bytes(3, "little")
+BMP = b"BM" + b"\x00" * 12 + struct.pack("<Iii", 40, 16, -32) + b"\x00" * 10
+
+@pytest.mark.parametrize("kind, expected", [
+    ("image/jpeg", "jpeg"),
+    ("image/svg+xml", "svg"),
+    ("image/x-icon", "ico"),
+    ("", ""),
+])
+def test_image_format(kind, expected):
+    assert expected == image_format(kind)
+
+@pytest.mark.parametrize("head, expected", [
+    (png(300, 200), (300, 200)),
+    (png(300, 200)[:20], None), #too short
+    (jpeg(640, 480), (640, 480)),
+    (jpeg(640, 480)[:24], None),
+    (GIF, (1, 1)),
+    (WEBP, (640, 480)),
+    (BMP, (16, 32)),
+    (b"<svg xmlns='http://www.w3.org/2000/svg'></svg>", None),
+])
+def test_image_size(head, expected):
+    assert expected == image_size(head)
+
+@pytest.mark.parametrize("options, head, done, expected", [
+    ({"min_width": 100}, png(300, 200), False, True),
+    ({"min_width": 100}, GIF, False, SkipDownload), #tracking pixel
+    ({"max_height": 100}, png(300, 200), False, SkipDownload),
+    ({"min_width": 100}, b"\xff\xd8\xff\xe1\x10\x00" + b"\x00" * 40, False, False), #exif first, need more bytes
+    ({"min_width": 100}, b"<svg xmlns='http://www.w3.org/2000/svg'></svg>", True, True), #size unknown
+    ({"formats": ["png", "jpg"]}, jpeg(640, 480), False, True),
+    ({"formats": ["png"]}, GIF, False, SkipDownload),
+])
+def test_check_head(options, head, done, expected):
+    image_filter = ImageFilter(**options)
+    if expected is SkipDownload:
+        with pytest.raises(SkipDownload):
+            image_filter.check_head(head, done)
+    else:
+        assert expected == image_filter.check_head(head, done)
+
+def test_download_images_filter(server, monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        monkeypatch.setattr(scrape, "FILTER", ImageFilter(min_width=2))
+        images = [f"{server}/img{i}.png" for i in range(2)]
+        scrape.save_info(images, tmp_folder)
+        assert scrape.download_images(images, tmp_folder) == 0
+        assert os.listdir(tmp_folder) == [scrape.INFO_FILE]
+        with open(os.path.join(tmp_folder, scrape.INFO_FILE)) as f:
+            assert f.read().count("SKIPPED: too small (1x1)") == 2
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+
+import pytest
+from conftest import Handler, PNG
+from scrape.session import *
+from scrape import *
+
+def test_session_keep_alive(server):
+    session = setup_session(pool_size=2, timeout=5, retries=0)
+    for i in range(5):
+        assert session.get(f"{server}/{i}.png").content == PNG
+    assert len(Handler.ports) == 1
+
+def test_session_defaults():
+    session = ScrapeSession(HEADERS, timeout=3)
+    assert session.timeout == 3
+    assert session.headers["User-Agent"] == HEADERS["User-Agent"]
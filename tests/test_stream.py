@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import pytest
+import os
+import tempfile
+from scrape.stream import *
+from scrape.probe import ImageFilter
+
+class FakeResponse:
+    def __init__(self, body, headers=None):
+        self.body = body
+        self.headers = headers or {}
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+@pytest.mark.parametrize("head, expected", [
+    (b"", ""),
+    (PNG, "image/png"),
+    (b"\xff\xd8\xff\xe0JFIF", "image/jpeg"),
+    (b"GIF89a\x01\x00", "image/gif"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "image/webp"),
+    (b"  <svg xmlns='http://www.w3.org/2000/svg'>", "image/svg+xml"),
+    (b"<!DOCTYPE html><html>", "text/html"),
+])
+def test_sniff_type(head, expected):
+    assert expected == sniff_type(head)
+
+@pytest.mark.parametrize("kind, types, expected", [
+    ("text/html", (), True),
+    ("image/png", ("image/",), True),
+    ("video/mp4", ("image/",), False),
+    ("video/mp4", ("image/", "video/mp4"), True),
+])
+def test_allowed_type(kind, types, expected):
+    assert expected == allowed_type(kind, types)
+
+@pytest.mark.parametrize("body, headers, max_size, types, ok", [
+    (PNG, {}, 0, (), True),
+    (PNG, {"Content-Type": "image/png"}, 1000, ("image/",), True),
+    (PNG, {"Content-Length": "5000"}, 1000, (), False), #header too large
+    (PNG * 20, {}, 1000, (), False), #body too large
+    (b"<html><body>", {"Content-Type": "image/png"}, 0, ("image/",), False), #mislabeled
+    (PNG, {"Content-Type": "application/octet-stream"}, 0, ("image/",), True),
+])
+def test_stream_to_temp(body, headers, max_size, types, ok):
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        response = FakeResponse(body, headers)
+        if ok:
+            tmp = stream_to_temp(response, tmp_folder, max_size, types, chunk_size=64)
+            with open(tmp, "rb") as f:
+                assert f.read() == body
+        else:
+            with pytest.raises(SkipDownload):
+                stream_to_temp(response, tmp_folder, max_size, types, chunk_size=64)
+            assert os.listdir(tmp_folder) == []
+
+@pytest.mark.parametrize("body, headers, options, ok", [
+    (PNG, {}, {"min_size": 50}, True),
+    (PNG, {"Content-Length": "20"}, {"min_size": 50}, False),
+    (PNG[:20], {}, {"min_size": 50}, False),
+    (b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01" + b"\x00" * 500, {}, {"min_width": 2}, False),
+])
+def test_stream_to_temp_filter(body, headers, options, ok):
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        response = FakeResponse(body, headers)
+        if ok:
+            tmp = stream_to_temp(response, tmp_folder, chunk_size=16, image_filter=ImageFilter(**options))
+            with open(tmp, "rb") as f:
+                assert f.read() == body
+        else:
+            with pytest.raises(SkipDownload):
+                stream_to_temp(response, tmp_folder, chunk_size=16, image_filter=ImageFilter(**options))
+            assert os.listdir(tmp_folder) == []